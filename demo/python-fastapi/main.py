@@ -7,14 +7,41 @@ monitoring server that receives metrics from agents.
 
 import asyncio
 import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, List, Optional
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException
+import msgspec
+import numpy as np
+import orjson
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        CollectorRegistry,
+        Counter,
+        Gauge,
+        generate_latest,
+        multiprocess,
+    )
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
 # Import NanoLink SDK (use local path for development)
 import sys
 from pathlib import Path
@@ -22,7 +49,16 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent / "sdk" / "python"))
 
 from nanolink import NanoLinkServer, ServerConfig
 from nanolink.connection import AgentConnection
-from nanolink.metrics import Metrics, RealtimeMetrics, StaticInfo, PeriodicData
+from nanolink.metrics import (
+    CpuMetrics,
+    MemoryMetrics,
+    Metrics,
+    PeriodicData,
+    RealtimeMetrics,
+    StaticInfo,
+)
+
+from shm_board import SharedMetricsBoard
 
 # Configure logging
 logging.basicConfig(
@@ -33,8 +69,29 @@ logger = logging.getLogger(__name__)
 
 
 # === Models ===
+#
+# Response-only models are msgspec Structs: construction and encoding run
+# in C with no validation pass. Pydantic is kept for request bodies, where
+# validating untrusted input is the point.
+
+def _enc_hook(obj):
+    # msgspec cannot encode mappingproxy; unwrap the published snapshot
+    # views with a shallow top-level copy (values are shared references)
+    if isinstance(obj, MappingProxyType):
+        return obj.copy()
+    raise NotImplementedError(f"Objects of type {type(obj)} are not supported")
+
+
+class MsgspecResponse(Response):
+    """JSON response encoded with msgspec (faster than orjson for Structs)"""
+    media_type = "application/json"
+    _encoder = msgspec.json.Encoder(enc_hook=_enc_hook)
 
-class AgentInfo(BaseModel):
+    def render(self, content) -> bytes:
+        return self._encoder.encode(content)
+
+
+class AgentInfo(msgspec.Struct):
     agent_id: str
     hostname: str
     os: str
@@ -43,7 +100,7 @@ class AgentInfo(BaseModel):
     connected_at: datetime
 
 
-class AgentMetrics(BaseModel):
+class AgentMetrics(msgspec.Struct):
     hostname: str
     cpu_usage: float
     memory_usage: float
@@ -65,32 +122,194 @@ class DockerRequest(BaseModel):
     container_name: str
 
 
-class CommandResponse(BaseModel):
+class CommandResponse(msgspec.Struct):
     success: bool
     message: str
 
 
-class ClusterSummary(BaseModel):
+class ClusterSummary(msgspec.Struct):
     agent_count: int
     avg_cpu_usage: float
     avg_memory_usage: float
 
 
-class HealthResponse(BaseModel):
+class HealthResponse(msgspec.Struct):
     status: str
     connected_agents: int
 
 
+# === Prometheus metrics (optional) ===
+
+if PROMETHEUS_AVAILABLE:
+    # With uvicorn --workers N, point PROMETHEUS_MULTIPROC_DIR at a shared
+    # directory so scrapes aggregate state from every worker process
+    _PROM_MULTIPROC = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+    prometheus_registry = CollectorRegistry()
+    if _PROM_MULTIPROC:
+        multiprocess.MultiProcessCollector(prometheus_registry)
+    _metric_kwargs = {} if _PROM_MULTIPROC else {"registry": prometheus_registry}
+
+    AGENTS_CONNECTED = Gauge(
+        "nanolink_agents_connected",
+        "Number of currently connected agents",
+        multiprocess_mode="livesum" if _PROM_MULTIPROC else "all",
+        **_metric_kwargs,
+    )
+    SAMPLES_INGESTED = Counter(
+        "nanolink_samples_ingested_total",
+        "Total metrics samples ingested",
+        **_metric_kwargs,
+    )
+    CPU_USAGE = Gauge(
+        "nanolink_cpu_usage",
+        "Latest CPU usage percentage per agent",
+        ["hostname"],
+        **_metric_kwargs,
+    )
+    MEMORY_USAGE = Gauge(
+        "nanolink_memory_usage",
+        "Latest memory usage percentage per agent",
+        ["hostname"],
+        **_metric_kwargs,
+    )
+
+
+# === Redis mirror (optional) ===
+
+class RedisMetricsStore:
+    """Mirrors latest metrics into a Redis hash for multi-worker deployments.
+
+    A single ingest process keeps writing through MetricsService as usual;
+    enabling the mirror (NANOLINK_REDIS_URL) lets any number of stateless
+    API workers serve /api/metrics from the shared hash instead of their
+    own, empty, in-memory state.
+    """
+
+    METRICS_KEY = "nanolink:metrics"
+    TTL = 120  # seconds without any update before the hash expires
+
+    def __init__(self, url: str):
+        self._redis = aioredis.from_url(url)
+
+    async def write_batch(self, samples: Dict[str, dict]) -> None:
+        """Write a batch of agent metric dicts in a single round trip"""
+        if not samples:
+            return
+        pipe = self._redis.pipeline(transaction=False)
+        for agent_id, data in samples.items():
+            pipe.hset(self.METRICS_KEY, agent_id, orjson.dumps(data))
+        pipe.expire(self.METRICS_KEY, self.TTL)
+        await pipe.execute()
+
+    async def remove(self, agent_id: str) -> None:
+        """Remove an agent's entry from the shared hash"""
+        await self._redis.hdel(self.METRICS_KEY, agent_id)
+
+    async def read_all(self) -> Dict[str, dict]:
+        """Read every agent's latest metrics from the shared hash"""
+        raw = await self._redis.hgetall(self.METRICS_KEY)
+        return {key.decode(): orjson.loads(value) for key, value in raw.items()}
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+# === History ring buffers ===
+
+class AgentRing:
+    """Fixed-capacity history of one agent's samples in columnar layout.
+
+    Preallocated NumPy arrays (one per column) cost a few bytes per sample
+    instead of one Python object each, and windowed averages vectorize
+    instead of looping over per-sample objects.
+    """
+
+    __slots__ = ("ts", "cpu", "mem", "i", "n", "cap")
+
+    def __init__(self, cap: int = 3600):
+        self.cap = cap
+        self.ts = np.zeros(cap, np.int64)
+        self.cpu = np.zeros(cap, np.float32)
+        self.mem = np.zeros(cap, np.float32)
+        self.i = 0  # next write slot
+        self.n = 0  # filled slots
+
+    def append(self, ts: int, cpu: float, mem: float) -> None:
+        self.ts[self.i] = ts
+        self.cpu[self.i] = cpu
+        self.mem[self.i] = mem
+        self.i = (self.i + 1) % self.cap
+        if self.n < self.cap:
+            self.n += 1
+
+    def _window_mask(self, since_ts: int) -> np.ndarray:
+        return self.ts[:self.n] >= since_ts
+
+    def mean_cpu(self, since_ts: int) -> Optional[float]:
+        """Mean CPU usage over samples newer than since_ts, or None if empty"""
+        mask = self._window_mask(since_ts)
+        if not mask.any():
+            return None
+        return float(self.cpu[:self.n][mask].mean())
+
+    def mean_mem(self, since_ts: int) -> Optional[float]:
+        """Mean memory usage over samples newer than since_ts, or None if empty"""
+        mask = self._window_mask(since_ts)
+        if not mask.any():
+            return None
+        return float(self.mem[:self.n][mask].mean())
+
+    def chronological(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return (ts, cpu, mem) columns in insertion order"""
+        if self.n < self.cap:
+            return self.ts[:self.n], self.cpu[:self.n], self.mem[:self.n]
+        order = np.concatenate((np.arange(self.i, self.cap), np.arange(self.i)))
+        return self.ts[order], self.cpu[order], self.mem[order]
+
+
 # === Metrics Service ===
 
 class MetricsService:
     """Service for managing agent metrics"""
 
+    # How often the published /api/metrics snapshot is refreshed
+    SNAPSHOT_INTERVAL = 0.1  # seconds
+
+    # Most samples drained from the ingest queue in one event-loop tick
+    INGEST_BATCH_SIZE = 256
+
+    # Repeat alerts for the same host/metric are coalesced within this window
+    ALERT_COOLDOWN = 30.0  # seconds
+
+    # Per-agent history capacity (one sample/second -> one hour)
+    HISTORY_CAPACITY = 3600
+
     def __init__(self):
         self.agents: Dict[str, AgentInfo] = {}
         self.latest_metrics: Dict[str, AgentMetrics] = {}
+        self._metrics_dicts: Dict[str, dict] = {}  # Precomputed dict form per agent
         self.static_info: Dict[str, StaticInfo] = {}
         self.periodic_data: Dict[str, PeriodicData] = {}
+        self._hostname_index: Dict[str, str] = {}  # hostname -> agent_id
+        # Running aggregates so /api/summary stays O(1) in the agent count
+        self._cpu_sum = 0.0
+        self._mem_sum = 0.0
+        # Published snapshot for /api/metrics: the dict is swapped wholesale
+        # and never mutated after publication, so readers need no copy
+        self._snapshot_dict: Dict[str, dict] = {}
+        self._snapshot: Mapping[str, dict] = MappingProxyType(self._snapshot_dict)
+        self._snapshot_dirty = False
+        self._snapshot_task: Optional[asyncio.Task] = None
+        # Bounded ingest queue so each sample does not wake the loop alone
+        self._ingest_queue: Optional[asyncio.Queue] = None
+        self._ingest_task: Optional[asyncio.Task] = None
+        self._last_alert: Dict[Tuple[str, str], float] = {}  # (hostname, metric) -> monotonic time
+        # Optional Redis mirror; flushed on the snapshot cadence
+        self._redis_store: Optional[RedisMetricsStore] = None
+        self._redis_dirty: set = set()  # agent_ids updated since last flush
+        self._rings: Dict[str, AgentRing] = {}  # per-agent sample history
+        # Optional shared-memory board (multi-process deployments)
+        self._shm_board: Optional[SharedMetricsBoard] = None
         self._websocket_clients: List = []  # WebSocket clients for broadcasting
 
     def register_agent(self, agent: AgentConnection) -> None:
@@ -104,22 +323,104 @@ class MetricsService:
             connected_at=agent.connected_at
         )
         self.agents[agent.agent_id] = info
+        self._hostname_index[agent.hostname] = agent.agent_id
+        if PROMETHEUS_AVAILABLE:
+            AGENTS_CONNECTED.set(len(self.agents))
         logger.info(f"Agent registered: {agent.hostname} ({agent.agent_id})")
 
     def unregister_agent(self, agent: AgentConnection) -> None:
         """Unregister an agent"""
         self.agents.pop(agent.agent_id, None)
-        self.latest_metrics.pop(agent.agent_id, None)
+        removed = self.latest_metrics.pop(agent.agent_id, None)
+        if removed is not None:
+            self._cpu_sum -= removed.cpu_usage
+            self._mem_sum -= removed.memory_usage
+        self._metrics_dicts.pop(agent.agent_id, None)
+        # A reconnect under the same hostname re-points the index at the new
+        # agent_id before the stale connection is reaped; the hostname-keyed
+        # state (index entry, shm slot, Prometheus series) must only be torn
+        # down when it still belongs to the agent being unregistered.
+        owns_hostname = self._hostname_index.get(agent.hostname) == agent.agent_id
+        if owns_hostname:
+            del self._hostname_index[agent.hostname]
+        self._snapshot_dirty = True
+        if self._redis_store is not None:
+            self._redis_dirty.discard(agent.agent_id)
+            asyncio.ensure_future(self._redis_store.remove(agent.agent_id))
+        self._rings.pop(agent.agent_id, None)
+        if self._shm_board is not None and owns_hostname:
+            self._shm_board.remove(agent.hostname)
+        if PROMETHEUS_AVAILABLE:
+            AGENTS_CONNECTED.set(len(self.agents))
+            if owns_hostname:
+                try:
+                    CPU_USAGE.remove(agent.hostname)
+                    MEMORY_USAGE.remove(agent.hostname)
+                except KeyError:
+                    pass
         logger.info(f"Agent unregistered: {agent.hostname} ({agent.agent_id})")
 
-    def process_metrics(self, metrics: Metrics) -> None:
-        """Process incoming metrics from an agent"""
-        # Find agent by hostname
-        agent_id = metrics.hostname
-        for aid, agent in self.agents.items():
-            if agent.hostname == metrics.hostname:
-                agent_id = aid
-                break
+    def _resolve_agent_id(self, hostname: str) -> str:
+        """Resolve a hostname to an agent_id (falls back to the hostname)"""
+        return self._hostname_index.get(hostname, hostname)
+
+    def _alert(self, metric: str, hostname: str, value: float) -> None:
+        """Emit a high-usage alert, coalescing repeats within the cooldown
+
+        Uses lazy %-formatting so nothing is built when the record is
+        dropped, and a per-(hostname, metric) cooldown so a persistently
+        hot host cannot flood the log handler from the ingest loop.
+        """
+        if not logger.isEnabledFor(logging.WARNING):
+            return
+        now = time.monotonic()
+        key = (hostname, metric)
+        last = self._last_alert.get(key)
+        if last is not None and now - last < self.ALERT_COOLDOWN:
+            return
+        self._last_alert[key] = now
+        logger.warning("HIGH %s ALERT: %s - usage at %.1f%%", metric, hostname, value)
+
+    def _store_metrics(self, agent_id: str, agent_metrics: AgentMetrics) -> None:
+        """Store the latest sample for an agent, keeping aggregates current"""
+        prev = self.latest_metrics.get(agent_id)
+        if prev is not None:
+            self._cpu_sum -= prev.cpu_usage
+            self._mem_sum -= prev.memory_usage
+        self._cpu_sum += agent_metrics.cpu_usage
+        self._mem_sum += agent_metrics.memory_usage
+        self.latest_metrics[agent_id] = agent_metrics
+        # Serialize once per sample so the read endpoints never pay for it
+        self._metrics_dicts[agent_id] = msgspec.structs.asdict(agent_metrics)
+        self._snapshot_dirty = True
+        if self._redis_store is not None:
+            self._redis_dirty.add(agent_id)
+        if PROMETHEUS_AVAILABLE:
+            SAMPLES_INGESTED.inc()
+            CPU_USAGE.labels(agent_metrics.hostname).set(agent_metrics.cpu_usage)
+            MEMORY_USAGE.labels(agent_metrics.hostname).set(agent_metrics.memory_usage)
+        ring = self._rings.get(agent_id)
+        if ring is None:
+            ring = self._rings[agent_id] = AgentRing(self.HISTORY_CAPACITY)
+        ts = int(agent_metrics.timestamp.timestamp())
+        ring.append(ts, agent_metrics.cpu_usage, agent_metrics.memory_usage)
+        if self._shm_board is not None:
+            self._shm_board.write(
+                agent_metrics.hostname,
+                ts,
+                agent_metrics.cpu_usage,
+                agent_metrics.memory_usage,
+            )
+
+    def process_metrics(self, metrics: Metrics, now: Optional[datetime] = None) -> None:
+        """Process incoming metrics from an agent
+
+        A caller processing several samples in one tick can pass a shared
+        timestamp to avoid one datetime.now() call per sample.
+        """
+        if now is None:
+            now = datetime.now()
+        agent_id = self._resolve_agent_id(metrics.hostname)
 
         # Calculate memory usage percentage
         memory_usage = 0.0
@@ -132,24 +433,28 @@ class MetricsService:
             memory_usage=memory_usage,
             memory_total=metrics.memory.total if metrics.memory else 0,
             memory_used=metrics.memory.used if metrics.memory else 0,
-            timestamp=datetime.now()
+            timestamp=now
         )
-        self.latest_metrics[agent_id] = agent_metrics
+        self._store_metrics(agent_id, agent_metrics)
 
         # Check for alerts
         if agent_metrics.cpu_usage > 90:
-            logger.warning(
-                f"HIGH CPU ALERT: {metrics.hostname} - CPU usage at {agent_metrics.cpu_usage:.1f}%"
-            )
+            self._alert("CPU", metrics.hostname, agent_metrics.cpu_usage)
         if agent_metrics.memory_usage > 90:
-            logger.warning(
-                f"HIGH MEMORY ALERT: {metrics.hostname} - Memory usage at {agent_metrics.memory_usage:.1f}%"
-            )
+            self._alert("MEMORY", metrics.hostname, agent_metrics.memory_usage)
 
     def get_agents(self) -> List[AgentInfo]:
         """Get all connected agents"""
         return list(self.agents.values())
 
+    def agent_count(self) -> int:
+        """Get the number of connected agents without building a list"""
+        return len(self.agents)
+
+    def metrics_count(self) -> int:
+        """Get the number of agents with a stored sample"""
+        return len(self.latest_metrics)
+
     def get_metrics(self, agent_id: str) -> Optional[AgentMetrics]:
         """Get metrics for an agent"""
         return self.latest_metrics.get(agent_id)
@@ -158,59 +463,176 @@ class MetricsService:
         """Get all latest metrics"""
         return dict(self.latest_metrics)
 
+    def get_metrics_as_dict(self, agent_id: str) -> Optional[dict]:
+        """Get the precomputed dict form of an agent's metrics"""
+        return self._metrics_dicts.get(agent_id)
+
+    def get_all_metrics_as_dicts(self) -> Mapping[str, dict]:
+        """Get the published snapshot of all latest metrics (dict form)
+
+        Returns a read-only mapping view; callers cannot mutate the
+        published snapshot through it.
+        """
+        # Without a running refresher task (e.g. sync usage), publish inline
+        if self._snapshot_task is None and self._snapshot_dirty:
+            self._publish_snapshot()
+        return self._snapshot
+
+    def _publish_snapshot(self) -> None:
+        """Swap in a fresh immutable snapshot of the metrics dicts"""
+        self._snapshot_dict = self._metrics_dicts.copy()
+        self._snapshot = MappingProxyType(self._snapshot_dict)
+        self._snapshot_dirty = False
+
+    def start_snapshot_refresh(self) -> None:
+        """Start the background task that periodically publishes snapshots"""
+        self._snapshot_task = asyncio.create_task(self._snapshot_loop())
+
+    async def stop_snapshot_refresh(self) -> None:
+        """Stop the snapshot refresh task"""
+        if self._snapshot_task:
+            self._snapshot_task.cancel()
+            try:
+                await self._snapshot_task
+            except asyncio.CancelledError:
+                pass
+            self._snapshot_task = None
+
+    def attach_redis(self, store: RedisMetricsStore) -> None:
+        """Attach a Redis mirror that receives metric updates"""
+        self._redis_store = store
+
+    def attach_shm_board(self, board: SharedMetricsBoard) -> None:
+        """Attach a shared-memory board that receives metric updates"""
+        self._shm_board = board
+
+    async def _snapshot_loop(self) -> None:
+        """Refresh the published snapshot at a fixed cadence when dirty"""
+        while True:
+            await asyncio.sleep(self.SNAPSHOT_INTERVAL)
+            if self._snapshot_dirty:
+                self._publish_snapshot()
+            if self._redis_store is not None and self._redis_dirty:
+                dirty, self._redis_dirty = self._redis_dirty, set()
+                updates = {
+                    aid: self._metrics_dicts[aid]
+                    for aid in dirty if aid in self._metrics_dicts
+                }
+                try:
+                    await self._redis_store.write_batch(updates)
+                except Exception as e:
+                    logger.error(f"Failed to mirror metrics to Redis: {e}")
+
+    def start_ingest_queue(self, maxsize: int = 4096) -> None:
+        """Start the queue and consumer task that batch incoming metrics"""
+        self._ingest_queue = asyncio.Queue(maxsize=maxsize)
+        self._ingest_task = asyncio.create_task(self._drain_ingest_queue())
+
+    async def stop_ingest_queue(self) -> None:
+        """Stop the ingest consumer task"""
+        if self._ingest_task:
+            self._ingest_task.cancel()
+            try:
+                await self._ingest_task
+            except asyncio.CancelledError:
+                pass
+            self._ingest_task = None
+        self._ingest_queue = None
+
+    async def enqueue_metrics(self, metrics: Metrics) -> None:
+        """Queue a metrics sample for batched processing"""
+        if self._ingest_queue is None:
+            # Queue not running (e.g. sync usage) - process immediately
+            self.process_metrics(metrics)
+            return
+        await self._ingest_queue.put(metrics)
+
+    async def _drain_ingest_queue(self) -> None:
+        """Drain queued samples and process them in batches
+
+        Waiting for the first sample then draining whatever else is already
+        queued lets one event-loop tick absorb a burst of samples with a
+        single timestamp and a single pass over service state.
+        """
+        queue = self._ingest_queue
+        while True:
+            items = [await queue.get()]
+            while not queue.empty() and len(items) < self.INGEST_BATCH_SIZE:
+                items.append(queue.get_nowait())
+            try:
+                self.process_metrics_batch(items)
+            except Exception:
+                # One poisoned sample must not kill the consumer for good
+                logger.exception("Failed to process metrics batch (%d samples)", len(items))
+
     def get_average_cpu(self) -> float:
         """Get average CPU usage across all agents"""
         if not self.latest_metrics:
             return 0.0
-        return sum(m.cpu_usage for m in self.latest_metrics.values()) / len(self.latest_metrics)
+        return self._cpu_sum / len(self.latest_metrics)
 
     def get_average_memory(self) -> float:
         """Get average memory usage across all agents"""
         if not self.latest_metrics:
             return 0.0
-        return sum(m.memory_usage for m in self.latest_metrics.values()) / len(self.latest_metrics)
-
-    def process_realtime(self, realtime: RealtimeMetrics) -> None:
+        return self._mem_sum / len(self.latest_metrics)
+
+    def get_window_average_cpu(self, window_seconds: int) -> float:
+        """Get average CPU usage over a trailing window, across all agents"""
+        since = int(time.time()) - window_seconds
+        means = [m for r in self._rings.values() if (m := r.mean_cpu(since)) is not None]
+        return sum(means) / len(means) if means else 0.0
+
+    def get_window_average_memory(self, window_seconds: int) -> float:
+        """Get average memory usage over a trailing window, across all agents"""
+        since = int(time.time()) - window_seconds
+        means = [m for r in self._rings.values() if (m := r.mean_mem(since)) is not None]
+        return sum(means) / len(means) if means else 0.0
+
+    def get_history(self, agent_id: str) -> Optional[Dict[str, list]]:
+        """Get an agent's sample history as parallel columns"""
+        ring = self._rings.get(agent_id)
+        if ring is None:
+            return None
+        ts, cpu, mem = ring.chronological()
+        return {
+            "timestamps": ts.tolist(),
+            "cpu_usage": cpu.tolist(),
+            "memory_usage": mem.tolist(),
+        }
+
+    def process_metrics_batch(self, batch: List[Metrics]) -> None:
+        """Process a batch of metrics samples under a single timestamp"""
+        now = datetime.now()
+        for metrics in batch:
+            self.process_metrics(metrics, now)
+
+    def process_realtime(self, realtime: RealtimeMetrics, now: Optional[datetime] = None) -> None:
         """Process incoming realtime metrics (high-frequency, lightweight)"""
-        # Find agent by hostname
-        agent_id = realtime.hostname
-        for aid, agent in self.agents.items():
-            if agent.hostname == realtime.hostname:
-                agent_id = aid
-                break
-
-        # Update only the realtime fields
-        if agent_id in self.latest_metrics:
-            current = self.latest_metrics[agent_id]
-            current.cpu_usage = realtime.cpu_usage
-            current.memory_usage = realtime.memory_percent
-            current.memory_used = realtime.memory_used
-            current.timestamp = datetime.now()
-        else:
-            # Create new entry with realtime data
-            self.latest_metrics[agent_id] = AgentMetrics(
-                hostname=realtime.hostname,
-                cpu_usage=realtime.cpu_usage,
-                memory_usage=realtime.memory_percent,
-                memory_total=0,
-                memory_used=realtime.memory_used,
-                timestamp=datetime.now()
-            )
+        if now is None:
+            now = datetime.now()
+        agent_id = self._resolve_agent_id(realtime.hostname)
+
+        # Update only the realtime fields, keeping memory_total from the
+        # last full sample when one exists
+        current = self.latest_metrics.get(agent_id)
+        agent_metrics = AgentMetrics(
+            hostname=realtime.hostname,
+            cpu_usage=realtime.cpu_usage,
+            memory_usage=realtime.memory_percent,
+            memory_total=current.memory_total if current else 0,
+            memory_used=realtime.memory_used,
+            timestamp=now
+        )
+        self._store_metrics(agent_id, agent_metrics)
 
         # Check for alerts
         if realtime.cpu_usage > 90:
-            logger.warning(
-                f"HIGH CPU ALERT: {realtime.hostname} - CPU usage at {realtime.cpu_usage:.1f}%"
-            )
+            self._alert("CPU", realtime.hostname, realtime.cpu_usage)
 
     def process_static_info(self, static_info: StaticInfo) -> None:
         """Process static hardware info (received once on connect)"""
-        # Find agent by hostname
-        agent_id = static_info.hostname
-        for aid, agent in self.agents.items():
-            if agent.hostname == static_info.hostname:
-                agent_id = aid
-                break
+        agent_id = self._resolve_agent_id(static_info.hostname)
 
         # Store static info
         self.static_info[agent_id] = static_info
@@ -222,20 +644,14 @@ class MetricsService:
         )
         # Update memory_total if available
         if static_info.memory and static_info.memory.total_physical > 0:
-            for aid, agent in self.agents.items():
-                if agent.hostname == static_info.hostname:
-                    if aid in self.latest_metrics:
-                        self.latest_metrics[aid].memory_total = static_info.memory.total_physical
-                    break
+            if agent_id in self.latest_metrics:
+                self.latest_metrics[agent_id].memory_total = static_info.memory.total_physical
+                self._metrics_dicts[agent_id] = msgspec.structs.asdict(self.latest_metrics[agent_id])
+                self._snapshot_dirty = True
 
     def process_periodic(self, periodic: PeriodicData) -> None:
         """Process periodic data (disk usage, user sessions, etc.)"""
-        # Find agent by hostname
-        agent_id = periodic.hostname
-        for aid, agent in self.agents.items():
-            if agent.hostname == periodic.hostname:
-                agent_id = aid
-                break
+        agent_id = self._resolve_agent_id(periodic.hostname)
 
         # Store periodic data
         self.periodic_data[agent_id] = periodic
@@ -309,6 +725,19 @@ class MetricsService:
 # === Global instances ===
 metrics_service = MetricsService()
 nanolink_server: Optional[NanoLinkServer] = None
+redis_store: Optional[RedisMetricsStore] = None
+shm_board: Optional[SharedMetricsBoard] = None
+
+# Serve /api/metrics from the shared Redis hash (for API-only workers)
+REDIS_READ = bool(os.getenv("NANOLINK_REDIS_READ"))
+
+# Serve /api/metrics from the shared-memory board (for API-only workers
+# on the same host as the ingest process)
+SHM_READ = bool(os.getenv("NANOLINK_SHM_READ"))
+
+# Read-only workers never run the ingest side (NanoLink server, ingest
+# queue, snapshot refresh) - exactly one ingest process owns those
+READ_ONLY = REDIS_READ or SHM_READ
 
 
 # === FastAPI App ===
@@ -316,112 +745,277 @@ nanolink_server: Optional[NanoLinkServer] = None
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler"""
-    global nanolink_server
-
-    # Initialize NanoLink server
-    # ws_port: for dashboard WebSocket connections (default: 9100)
-    # grpc_port: for agent gRPC connections (default: 39100)
-    config = ServerConfig(ws_port=9100, grpc_port=39100)
-    nanolink_server = NanoLinkServer(config)
-
-    @nanolink_server.on_agent_connect
-    async def on_connect(agent: AgentConnection):
-        logger.info(f"Agent connected: {agent.hostname} ({agent.os}/{agent.arch})")
-        metrics_service.register_agent(agent)
-
-    @nanolink_server.on_agent_disconnect
-    async def on_disconnect(agent: AgentConnection):
-        logger.info(f"Agent disconnected: {agent.hostname}")
-        metrics_service.unregister_agent(agent)
-
-    @nanolink_server.on_metrics
-    async def on_metrics(metrics: Metrics):
-        metrics_service.process_metrics(metrics)
-
-    @nanolink_server.on_realtime_metrics
-    async def on_realtime(realtime: RealtimeMetrics):
-        metrics_service.process_realtime(realtime)
+    global nanolink_server, redis_store, shm_board
+
+    shm_name = os.getenv("NANOLINK_SHM_NAME")
+    if shm_name:
+        if SHM_READ:
+            # API-only workers attach to the board the ingest process owns;
+            # retry briefly in case this worker starts first
+            for attempt in range(10):
+                try:
+                    shm_board = SharedMetricsBoard(shm_name, create=False)
+                    break
+                except FileNotFoundError:
+                    await asyncio.sleep(0.5)
+            else:
+                raise RuntimeError(
+                    f"Shared memory segment '{shm_name}' not found - "
+                    "is the ingest process running?"
+                )
+        else:
+            shm_board = SharedMetricsBoard(shm_name, create=True)
+            metrics_service.attach_shm_board(shm_board)
+        logger.info(f"Shared-memory metrics board '{shm_name}' attached")
 
-    @nanolink_server.on_static_info
-    async def on_static(static_info: StaticInfo):
-        metrics_service.process_static_info(static_info)
+    # Single-thread pool for Prometheus scrape serialization
+    app.state.metrics_pool = ThreadPoolExecutor(
+        max_workers=1, thread_name_prefix="prom-scrape"
+    )
 
-    @nanolink_server.on_periodic_data
-    async def on_periodic(periodic: PeriodicData):
-        metrics_service.process_periodic(periodic)
+    redis_url = os.getenv("NANOLINK_REDIS_URL")
+    if redis_url:
+        if REDIS_AVAILABLE:
+            redis_store = RedisMetricsStore(redis_url)
+            metrics_service.attach_redis(redis_store)
+            logger.info("Mirroring metrics to Redis")
+        else:
+            logger.warning(
+                "NANOLINK_REDIS_URL is set but the redis package is not installed"
+            )
 
-    # Start NanoLink server in background
-    logger.info("Starting NanoLink Server - WebSocket port 9100, gRPC port 39100")
-    await nanolink_server.start()
+    # Read-only API workers serve /api/metrics from the shared view and
+    # must not bind the agent ports: add_insecure_port fails silently, so
+    # a worker racing the ingest process for 9100/39100 would otherwise
+    # run a ghost ingest server whose state nothing serves.
+    if not READ_ONLY:
+        # Initialize NanoLink server
+        # ws_port: for dashboard WebSocket connections (default: 9100)
+        # grpc_port: for agent gRPC connections (default: 39100)
+        config = ServerConfig(ws_port=9100, grpc_port=39100)
+        nanolink_server = NanoLinkServer(config)
+
+        @nanolink_server.on_agent_connect
+        async def on_connect(agent: AgentConnection):
+            logger.info(f"Agent connected: {agent.hostname} ({agent.os}/{agent.arch})")
+            metrics_service.register_agent(agent)
+
+        @nanolink_server.on_agent_disconnect
+        async def on_disconnect(agent: AgentConnection):
+            logger.info(f"Agent disconnected: {agent.hostname}")
+            metrics_service.unregister_agent(agent)
+
+        @nanolink_server.on_metrics
+        async def on_metrics(metrics: Metrics):
+            await metrics_service.enqueue_metrics(metrics)
+
+        @nanolink_server.on_realtime_metrics
+        async def on_realtime(realtime: RealtimeMetrics):
+            metrics_service.process_realtime(realtime)
+
+        @nanolink_server.on_static_info
+        async def on_static(static_info: StaticInfo):
+            metrics_service.process_static_info(static_info)
+
+        @nanolink_server.on_periodic_data
+        async def on_periodic(periodic: PeriodicData):
+            metrics_service.process_periodic(periodic)
+
+        # Start NanoLink server in background
+        logger.info("Starting NanoLink Server - WebSocket port 9100, gRPC port 39100")
+        metrics_service.start_ingest_queue()
+        await nanolink_server.start()
+        metrics_service.start_snapshot_refresh()
+    else:
+        logger.info("Read-only API worker - NanoLink ingest server not started")
 
     yield
 
     # Shutdown
-    logger.info("Stopping NanoLink Server...")
-    await nanolink_server.stop()
+    if nanolink_server is not None:
+        logger.info("Stopping NanoLink Server...")
+        await metrics_service.stop_snapshot_refresh()
+        await nanolink_server.stop()
+        await metrics_service.stop_ingest_queue()
+        nanolink_server = None
+    if redis_store is not None:
+        await redis_store.close()
+    if shm_board is not None:
+        shm_board.close()
+    app.state.metrics_pool.shutdown(wait=False)
 
 
 app = FastAPI(
     title="NanoLink FastAPI Demo",
     description="Demo server showing NanoLink SDK integration with FastAPI",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=MsgspecResponse
 )
 
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Prometheus scrape endpoint
+if PROMETHEUS_AVAILABLE:
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        """Serve the Prometheus scrape without blocking the event loop
+
+        generate_latest can take tens of ms with many labelled series,
+        during which every co-tenant endpoint would stall, so it runs in a
+        dedicated single-thread executor.
+        """
+        loop = asyncio.get_running_loop()
+        body = await loop.run_in_executor(
+            app.state.metrics_pool, generate_latest, prometheus_registry
+        )
+        return Response(content=body, media_type=CONTENT_TYPE_LATEST)
+
+# CORS middleware — opt-in via CORS_ORIGINS (comma-separated). When the
+# dashboard is served from the same origin or behind a reverse proxy the
+# middleware only adds a per-request origin check on the hot read paths,
+# so it is not installed by default.
+_cors_origins = os.getenv("CORS_ORIGINS")
+if _cors_origins:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[o.strip() for o in _cors_origins.split(",")],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
 
 # === API Routes ===
 
-@app.get("/api/agents", response_model=Dict)
+@app.get("/api/agents")
 async def get_agents():
     """Get all connected agents"""
     agents = metrics_service.get_agents()
-    return {"agents": agents, "count": len(agents)}
+    return MsgspecResponse({"agents": agents, "count": len(agents)})
 
 
-@app.get("/api/agents/{agent_id}/metrics", response_model=AgentMetrics)
+@app.get("/api/agents/{agent_id}/metrics")
 async def get_agent_metrics(agent_id: str):
     """Get metrics for a specific agent"""
     metrics = metrics_service.get_metrics(agent_id)
     if metrics is None:
         raise HTTPException(status_code=404, detail="Agent not found")
-    return metrics
+    return MsgspecResponse(metrics)
 
 
-@app.get("/api/metrics", response_model=Dict[str, AgentMetrics])
+@app.get("/api/metrics")
 async def get_all_metrics():
     """Get all latest metrics"""
-    return metrics_service.get_all_metrics()
+    if REDIS_READ and redis_store is not None:
+        return MsgspecResponse(await redis_store.read_all())
+    if SHM_READ and shm_board is not None:
+        return MsgspecResponse(shm_board.read_all())
+    return MsgspecResponse(metrics_service.get_all_metrics_as_dicts())
+
+
+@app.get("/api/agents/{agent_id}/history")
+async def get_agent_history(agent_id: str):
+    """Get an agent's recent sample history (columnar, chronological)"""
+    history = metrics_service.get_history(agent_id)
+    if history is None:
+        raise HTTPException(status_code=404, detail="Agent not found")
+    return MsgspecResponse(history)
+
+
+@app.get("/api/metrics/stream")
+async def stream_all_metrics():
+    """Stream all latest metrics as NDJSON, one agent per line
+
+    For fleets with thousands of agents this keeps first-byte latency and
+    server-side serialization memory independent of the agent count,
+    unlike /api/metrics which materializes the whole document up front.
+    """
+    encoder = msgspec.json.Encoder()
+    # The published snapshot is never mutated, so iteration is safe
+    snapshot = metrics_service.get_all_metrics_as_dicts()
+
+    async def generate():
+        for agent_id, data in snapshot.items():
+            yield encoder.encode({"agent_id": agent_id, **data}) + b"\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@app.get("/api/summary")
+async def get_summary(window: Optional[int] = None):
+    """Get cluster summary
+
+    Without a window the averages reflect each agent's latest sample;
+    with ?window=<seconds> they are averaged over that trailing window
+    from the per-agent history rings.
+    """
+    if window is not None:
+        avg_cpu = metrics_service.get_window_average_cpu(window)
+        avg_mem = metrics_service.get_window_average_memory(window)
+    else:
+        avg_cpu = metrics_service.get_average_cpu()
+        avg_mem = metrics_service.get_average_memory()
+    return MsgspecResponse(ClusterSummary(
+        agent_count=metrics_service.agent_count(),
+        avg_cpu_usage=avg_cpu,
+        avg_memory_usage=avg_mem
+    ))
+
+
+@app.get("/api/health")
+async def health():
+    """Health check endpoint"""
+    return MsgspecResponse(HealthResponse(
+        status="ok",
+        connected_agents=metrics_service.agent_count()
+    ))
 
 
-@app.get("/api/summary", response_model=ClusterSummary)
-async def get_summary():
-    """Get cluster summary"""
-    return ClusterSummary(
-        agent_count=len(metrics_service.get_agents()),
-        avg_cpu_usage=metrics_service.get_average_cpu(),
-        avg_memory_usage=metrics_service.get_average_memory()
-    )
+# Typed wire schema for /ingest. msgspec validates field types during
+# decode, so a payload like {"cpu": {"usagePercent": "oops"}} is rejected
+# with 400 instead of poisoning the running averages downstream.
+class _IngestCpu(msgspec.Struct, rename="camel"):
+    usage_percent: float = 0.0
 
 
-@app.get("/api/health", response_model=HealthResponse)
-async def health():
-    """Health check endpoint"""
-    return HealthResponse(
-        status="ok",
-        connected_agents=len(metrics_service.get_agents())
+class _IngestMemory(msgspec.Struct):
+    total: int = 0
+    used: int = 0
+
+
+class _IngestPayload(msgspec.Struct):
+    hostname: str = ""
+    timestamp: int = 0
+    cpu: Optional[_IngestCpu] = None
+    memory: Optional[_IngestMemory] = None
+
+
+_ingest_decoder = msgspec.json.Decoder(_IngestPayload)
+
+
+@app.post("/ingest")
+async def ingest(request: Request):
+    """Trusted HTTP ingest path for metrics payloads
+
+    Reads the raw body and decodes it through a typed msgspec schema,
+    skipping FastAPI's dependency injection and Pydantic body validation
+    entirely. Only expose this to trusted agents.
+    """
+    try:
+        payload = _ingest_decoder.decode(await request.body())
+    except msgspec.DecodeError:
+        raise HTTPException(status_code=400, detail="Invalid metrics payload")
+    metrics = Metrics(
+        timestamp=payload.timestamp,
+        hostname=payload.hostname,
+        cpu=CpuMetrics(usage_percent=payload.cpu.usage_percent) if payload.cpu else None,
+        memory=MemoryMetrics(total=payload.memory.total, used=payload.memory.used)
+        if payload.memory else None,
     )
+    await metrics_service.enqueue_metrics(metrics)
+    return Response(content=b'{"ok":true}', media_type="application/json")
 
 
-@app.post("/api/commands/agents/{hostname}/service/restart", response_model=CommandResponse)
+@app.post("/api/commands/agents/{hostname}/service/restart")
 async def restart_service(hostname: str, request: ServiceRequest):
     """Restart a service on an agent"""
     if nanolink_server is None:
@@ -435,13 +1029,13 @@ async def restart_service(hostname: str, request: ServiceRequest):
         logger.info(f"Restarting service {request.service_name} on {hostname}")
         # Note: Command execution is async in the Python SDK
         # The actual command would be sent here
-        return CommandResponse(success=True, message="Service restart command sent")
+        return MsgspecResponse(CommandResponse(success=True, message="Service restart command sent"))
     except Exception as e:
         logger.error(f"Failed to restart service on {hostname}: {e}")
-        return CommandResponse(success=False, message=str(e))
+        return MsgspecResponse(CommandResponse(success=False, message=str(e)))
 
 
-@app.post("/api/commands/agents/{hostname}/process/kill", response_model=CommandResponse)
+@app.post("/api/commands/agents/{hostname}/process/kill")
 async def kill_process(hostname: str, request: ProcessRequest):
     """Kill a process on an agent"""
     if nanolink_server is None:
@@ -454,13 +1048,13 @@ async def kill_process(hostname: str, request: ProcessRequest):
     try:
         target = request.target if request.target else str(request.pid)
         logger.info(f"Killing process {target} on {hostname}")
-        return CommandResponse(success=True, message="Process kill command sent")
+        return MsgspecResponse(CommandResponse(success=True, message="Process kill command sent"))
     except Exception as e:
         logger.error(f"Failed to kill process on {hostname}: {e}")
-        return CommandResponse(success=False, message=str(e))
+        return MsgspecResponse(CommandResponse(success=False, message=str(e)))
 
 
-@app.post("/api/commands/agents/{hostname}/docker/restart", response_model=CommandResponse)
+@app.post("/api/commands/agents/{hostname}/docker/restart")
 async def restart_container(hostname: str, request: DockerRequest):
     """Restart a Docker container on an agent"""
     if nanolink_server is None:
@@ -472,13 +1066,29 @@ async def restart_container(hostname: str, request: DockerRequest):
 
     try:
         logger.info(f"Restarting container {request.container_name} on {hostname}")
-        return CommandResponse(success=True, message="Container restart command sent")
+        return MsgspecResponse(CommandResponse(success=True, message="Container restart command sent"))
     except Exception as e:
         logger.error(f"Failed to restart container on {hostname}: {e}")
-        return CommandResponse(success=False, message=str(e))
+        return MsgspecResponse(CommandResponse(success=False, message=str(e)))
 
 
 if __name__ == "__main__":
     import uvicorn
+
+    try:
+        import uvloop  # noqa: F401
+        loop_impl, http_impl = "uvloop", "httptools"
+    except ImportError:
+        # uvloop is not available on Windows; fall back to the stdlib loop
+        loop_impl, http_impl = "auto", "auto"
+
     logger.info("Starting REST API server on http://localhost:8000")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        loop=loop_impl,
+        http=http_impl,
+        access_log=False,
+        log_level="warning",
+    )
@@ -0,0 +1,110 @@
+"""
+Shared-memory metrics board for multi-process deployments.
+
+The GIL caps the asyncio ingest loop at one core, so the scalable split is
+one ingest process and N API worker processes. This module provides the
+shared state between them: a structure-of-arrays board of latest samples
+in POSIX shared memory. The ingest process owns the writer; API workers
+attach read-only by name and serve directly from the block with no
+serialization or IPC round trip per request.
+
+Layout is a fixed-capacity structured array (timestamp, cpu, mem,
+fixed-width hostname). Each hostname gets a stable slot assigned by the
+writer, so a reader sees at worst one torn sample, never a torn layout.
+"""
+
+import logging
+from multiprocessing import shared_memory
+from typing import Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# One board slot: SoA columns packed per agent
+SLOT_DTYPE = np.dtype([
+    ("ts", "i8"),      # unix seconds; 0 marks an empty slot
+    ("cpu", "f4"),     # CPU usage percent
+    ("mem", "f4"),     # memory usage percent
+    ("host", "S64"),   # hostname, truncated to 64 bytes
+])
+
+DEFAULT_CAPACITY = 1024  # max agents on one board
+
+
+class SharedMetricsBoard:
+    """Latest-sample board shared between an ingest process and API workers"""
+
+    def __init__(self, name: str, capacity: int = DEFAULT_CAPACITY, create: bool = False):
+        self._owner = create
+        if create:
+            try:
+                self._shm = shared_memory.SharedMemory(
+                    name=name, create=True, size=SLOT_DTYPE.itemsize * capacity
+                )
+                self.capacity = capacity
+            except FileExistsError:
+                # An unclean shutdown left the segment behind; reclaim it.
+                # The board is zeroed below, so stale rows do not leak.
+                logger.warning("Reclaiming leftover shared memory segment '%s'", name)
+                self._shm = shared_memory.SharedMemory(name=name)
+                self.capacity = self._shm.size // SLOT_DTYPE.itemsize
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            # Attach side: the block defines the capacity
+            self.capacity = self._shm.size // SLOT_DTYPE.itemsize
+        self._array = np.ndarray((self.capacity,), dtype=SLOT_DTYPE, buffer=self._shm.buf)
+        if create:
+            self._array[:] = 0
+        self._slots: Dict[str, int] = {}  # writer-side hostname -> slot
+        self._free_slots: list = []  # slots released by remove(), reused first
+        self._next_slot = 0
+
+    def write(self, hostname: str, ts: int, cpu: float, mem: float) -> None:
+        """Write an agent's latest sample (writer process only)"""
+        slot = self._slots.get(hostname)
+        if slot is None:
+            if self._free_slots:
+                slot = self._free_slots.pop()
+            elif self._next_slot < self.capacity:
+                slot = self._next_slot
+                self._next_slot += 1
+            else:
+                logger.warning("Shared metrics board full, dropping %s", hostname)
+                return
+            self._slots[hostname] = slot
+        self._array[slot] = (ts, cpu, mem, hostname.encode()[:64])
+
+    def remove(self, hostname: str) -> None:
+        """Clear an agent's slot (writer process only)"""
+        slot = self._slots.pop(hostname, None)
+        if slot is not None:
+            self._array[slot] = (0, 0.0, 0.0, b"")
+            self._free_slots.append(slot)
+
+    def read_all(self) -> Dict[str, dict]:
+        """Snapshot the board into plain dicts keyed by hostname"""
+        # copy() snapshots the block before decoding so a concurrent writer
+        # cannot change rows under us mid-iteration
+        snapshot = self._array.copy()
+        out: Dict[str, dict] = {}
+        for row in snapshot:
+            if row["ts"] == 0:
+                continue
+            out[row["host"].decode()] = {
+                "timestamp": int(row["ts"]),
+                "cpu_usage": float(row["cpu"]),
+                "memory_usage": float(row["mem"]),
+            }
+        return out
+
+    def close(self) -> None:
+        """Detach from the block, unlinking it if this process created it"""
+        # Drop the array view before closing or the buffer stays referenced
+        self._array = None
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -2,9 +2,25 @@
 Metrics data models for NanoLink SDK
 """
 
+import json
+import sys
 from dataclasses import dataclass, field
 from enum import IntEnum
-from typing import List, Optional
+from typing import List, Optional, Union
+
+# Slotted dataclasses skip the per-instance __dict__, which roughly halves
+# the memory footprint of a sample and speeds up attribute access.
+# dataclass(slots=True) requires Python 3.10; older interpreters fall back
+# to regular instances.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+try:
+    import msgspec
+    _json_decode = msgspec.json.decode
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    _json_decode = json.loads
+    MSGSPEC_AVAILABLE = False
 
 
 class MetricsType(IntEnum):
@@ -26,7 +42,7 @@ class DataRequestType(IntEnum):
     HEALTH = 6         # Request disk S.M.A.R.T status
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class CpuMetrics:
     """CPU metrics data"""
     usage_percent: float = 0.0
@@ -40,7 +56,7 @@ class CpuMetrics:
     architecture: str = ""
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class MemoryMetrics:
     """Memory metrics data"""
     total: int = 0
@@ -52,23 +68,18 @@ class MemoryMetrics:
     buffers: int = 0
     memory_type: str = ""  # DDR4, DDR5, etc.
     speed_mhz: int = 0
+    # Computed once in __post_init__ rather than per access
+    usage_percent: float = 0.0
+    swap_usage_percent: float = 0.0
 
-    @property
-    def usage_percent(self) -> float:
-        """Calculate memory usage percentage"""
-        if self.total == 0:
-            return 0.0
-        return (self.used / self.total) * 100
-
-    @property
-    def swap_usage_percent(self) -> float:
-        """Calculate swap usage percentage"""
-        if self.swap_total == 0:
-            return 0.0
-        return (self.swap_used / self.swap_total) * 100
+    def __post_init__(self):
+        self.usage_percent = (self.used / self.total) * 100 if self.total else 0.0
+        self.swap_usage_percent = (
+            (self.swap_used / self.swap_total) * 100 if self.swap_total else 0.0
+        )
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class DiskMetrics:
     """Disk metrics data"""
     mount_point: str = ""
@@ -86,16 +97,14 @@ class DiskMetrics:
     disk_type: str = ""  # SSD, HDD, NVMe
     temperature_celsius: Optional[float] = None
     health_status: str = ""
+    # Computed once in __post_init__ rather than per access
+    usage_percent: float = 0.0
 
-    @property
-    def usage_percent(self) -> float:
-        """Calculate disk usage percentage"""
-        if self.total == 0:
-            return 0.0
-        return (self.used / self.total) * 100
+    def __post_init__(self):
+        self.usage_percent = (self.used / self.total) * 100 if self.total else 0.0
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class NetworkMetrics:
     """Network interface metrics data"""
     interface: str = ""
@@ -110,7 +119,7 @@ class NetworkMetrics:
     interface_type: str = ""  # ethernet, wifi, loopback
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class GpuMetrics:
     """GPU metrics data"""
     index: int = 0
@@ -130,16 +139,16 @@ class GpuMetrics:
     pcie_width: int = 0
     encoder_usage_percent: float = 0.0
     decoder_usage_percent: float = 0.0
+    # Computed once in __post_init__ rather than per access
+    memory_usage_percent: float = 0.0
 
-    @property
-    def memory_usage_percent(self) -> float:
-        """Calculate GPU memory usage percentage"""
-        if self.memory_total == 0:
-            return 0.0
-        return (self.memory_used / self.memory_total) * 100
+    def __post_init__(self):
+        self.memory_usage_percent = (
+            (self.memory_used / self.memory_total) * 100 if self.memory_total else 0.0
+        )
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class NpuMetrics:
     """NPU/AI accelerator metrics data"""
     index: int = 0
@@ -151,16 +160,16 @@ class NpuMetrics:
     temperature_celsius: float = 0.0
     power_watts: int = 0
     driver_version: str = ""
+    # Computed once in __post_init__ rather than per access
+    memory_usage_percent: float = 0.0
 
-    @property
-    def memory_usage_percent(self) -> float:
-        """Calculate NPU memory usage percentage"""
-        if self.memory_total == 0:
-            return 0.0
-        return (self.memory_used / self.memory_total) * 100
+    def __post_init__(self):
+        self.memory_usage_percent = (
+            (self.memory_used / self.memory_total) * 100 if self.memory_total else 0.0
+        )
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class UserSession:
     """User session/login information"""
     username: str = ""
@@ -171,7 +180,7 @@ class UserSession:
     session_type: str = ""  # local, ssh, rdp, console
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class SystemInfo:
     """System information data"""
     os_name: str = ""
@@ -185,7 +194,7 @@ class SystemInfo:
     bios_version: str = ""
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Metrics:
     """Complete system metrics from an agent"""
     timestamp: int = 0
@@ -335,10 +344,20 @@ class Metrics:
 
         return metrics
 
+    @classmethod
+    def from_json(cls, data: Union[bytes, str]) -> "Metrics":
+        """Create Metrics from a raw JSON payload.
+
+        Uses msgspec's C decoder when installed (noticeably faster and with
+        fewer transient allocations than the stdlib json module), falling
+        back to json.loads otherwise.
+        """
+        return cls.from_dict(_json_decode(data))
+
 
 # ========== Layered Metrics Types ==========
 
-@dataclass
+@dataclass(**_SLOTS)
 class DiskIO:
     """Disk IO metrics (realtime)"""
     device: str = ""
@@ -348,7 +367,7 @@ class DiskIO:
     write_iops: int = 0
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class NetworkIO:
     """Network IO metrics (realtime)"""
     interface: str = ""
@@ -359,7 +378,7 @@ class NetworkIO:
     is_up: bool = False
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class GpuUsage:
     """GPU usage metrics (realtime)"""
     index: int = 0
@@ -372,7 +391,7 @@ class GpuUsage:
     decoder_usage: float = 0.0
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class NpuUsage:
     """NPU usage metrics (realtime)"""
     index: int = 0
@@ -382,7 +401,7 @@ class NpuUsage:
     power_watts: int = 0
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class RealtimeMetrics:
     """Realtime metrics sent every second (lightweight)"""
     timestamp: int = 0
@@ -457,8 +476,13 @@ class RealtimeMetrics:
 
         return metrics
 
+    @classmethod
+    def from_json(cls, data: Union[bytes, str]) -> "RealtimeMetrics":
+        """Create RealtimeMetrics from a raw JSON payload."""
+        return cls.from_dict(_json_decode(data))
+
 
-@dataclass
+@dataclass(**_SLOTS)
 class CpuStaticInfo:
     """CPU static information"""
     model: str = ""
@@ -472,7 +496,7 @@ class CpuStaticInfo:
     l3_cache_kb: int = 0
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class MemoryStaticInfo:
     """Memory static information"""
     total: int = 0
@@ -482,7 +506,7 @@ class MemoryStaticInfo:
     slots: int = 0
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class DiskStaticInfo:
     """Disk static information"""
     device: str = ""
@@ -495,7 +519,7 @@ class DiskStaticInfo:
     health_status: str = ""
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class NetworkStaticInfo:
     """Network static information"""
     interface: str = ""
@@ -506,7 +530,7 @@ class NetworkStaticInfo:
     is_virtual: bool = False
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class GpuStaticInfo:
     """GPU static information"""
     index: int = 0
@@ -518,7 +542,7 @@ class GpuStaticInfo:
     power_limit_watts: int = 0
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class NpuStaticInfo:
     """NPU static information"""
     index: int = 0
@@ -528,7 +552,7 @@ class NpuStaticInfo:
     driver_version: str = ""
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class StaticInfo:
     """Static hardware information (sent once on connect or on request)"""
     timestamp: int = 0
@@ -630,8 +654,13 @@ class StaticInfo:
 
         return info
 
+    @classmethod
+    def from_json(cls, data: Union[bytes, str]) -> "StaticInfo":
+        """Create StaticInfo from a raw JSON payload."""
+        return cls.from_dict(_json_decode(data))
+
 
-@dataclass
+@dataclass(**_SLOTS)
 class DiskUsage:
     """Disk usage data (periodic)"""
     device: str = ""
@@ -640,15 +669,14 @@ class DiskUsage:
     used: int = 0
     available: int = 0
     temperature_celsius: float = 0.0
+    # Computed once in __post_init__ rather than per access
+    usage_percent: float = 0.0
 
-    @property
-    def usage_percent(self) -> float:
-        if self.total == 0:
-            return 0.0
-        return (self.used / self.total) * 100
+    def __post_init__(self):
+        self.usage_percent = (self.used / self.total) * 100 if self.total else 0.0
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class NetworkAddressUpdate:
     """Network address update (periodic)"""
     interface: str = ""
@@ -656,7 +684,7 @@ class NetworkAddressUpdate:
     is_up: bool = False
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class PeriodicData:
     """Periodic data (disk usage, user sessions - sent less frequently)"""
     timestamp: int = 0
@@ -700,3 +728,8 @@ class PeriodicData:
             ))
 
         return periodic
+
+    @classmethod
+    def from_json(cls, data: Union[bytes, str]) -> "PeriodicData":
+        """Create PeriodicData from a raw JSON payload."""
+        return cls.from_dict(_json_decode(data))
@@ -274,6 +274,19 @@ class TestMetrics:
         assert metrics.npus[0].vendor == "Intel"
         assert metrics.npus[0].usage_percent == 45.0
 
+    def test_from_json_basic(self):
+        data = b'{"timestamp": 1234567890, "hostname": "test-server"}'
+        metrics = Metrics.from_json(data)
+        assert metrics.timestamp == 1234567890
+        assert metrics.hostname == "test-server"
+
+    def test_from_json_with_cpu(self):
+        data = b'{"hostname": "test-server", "cpu": {"usagePercent": 45.5, "coreCount": 8}}'
+        metrics = Metrics.from_json(data)
+        assert metrics.cpu is not None
+        assert metrics.cpu.usage_percent == 45.5
+        assert metrics.cpu.core_count == 8
+
     def test_from_dict_with_user_sessions(self):
         data = {
             "timestamp": 1234567890,